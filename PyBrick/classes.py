@@ -227,10 +227,23 @@ class Order(object):
     def totalprice(self):
         return round(sum(lot.price_total for lot in self.lots), 3)
 
-    def score(self):
-        return round(self.totalprice() + self.weight * len(self.vendors)
-                     + self.w_far * len([v for v in self.vendors
-                                         if not v.close]))
+    def nr_far(self):
+        return len([v for v in self.vendors if not v.close])
+
+    def objectives(self):
+        """
+        The quantities that are traded off against each other: total price,
+        number of vendors and number of far vendors
+        """
+        return self.totalprice(), len(self.vendors), self.nr_far()
+
+    def score(self, weight=None, w_far=None):
+        if weight is None:
+            weight = self.weight
+        if w_far is None:
+            w_far = self.w_far
+        return round(self.totalprice() + weight * len(self.vendors)
+                     + w_far * self.nr_far())
 
     def give_URLs(self):
         lpv = self.lots_per_vendor()
@@ -244,18 +257,37 @@ class Order(object):
         with open(filename, "w") as f:
             f.write(string)
 
+    def _money_per_vendor(self):
+        """
+        Unrounded total price per vendor, in one pass over the lots
+        """
+        money = dict.fromkeys(self.vendors, 0.)
+        for lot in self.lots:
+            money[lot.vendor] += lot.price_total
+        return money
+
     def valid_minbuy(self):
-        return all([sum(lot.price_total for lot in self.lots if lot.vendor == vendor) >= vendor.minbuy for vendor in self.vendors])
+        money = self._money_per_vendor()
+        return all(money[vendor] >= vendor.minbuy for vendor in self.vendors)
 
     def lots_per_vendor(self):
-        return {vendor: sorted([lot for lot in self.lots if lot.vendor == vendor], key=lambda lot: lot.order_amount) for vendor in self.vendors}
+        """
+        Group the lots by vendor in one pass over the lots
+        """
+        lpv = {vendor: [] for vendor in self.vendors}
+        for lot in self.lots:
+            lpv[lot.vendor].append(lot)
+        for lots in lpv.values():
+            lots.sort(key=lambda lot: lot.order_amount)
+        return lpv
 
     def nr_lots_per_vendor(self):
         lpv = self.lots_per_vendor()
         return {vendor: len(lots) for vendor, lots in iteritems(lpv)}
 
     def money_per_vendor(self):
-        return {vendor: round(sum([lot.price_total for lot in self.lots if lot.vendor == vendor]), 3) for vendor in self.vendors}
+        return {vendor: round(total, 3) for vendor, total
+                in iteritems(self._money_per_vendor())}
 
     def __eq__(self, other):
         return self.score() == other.score()
@@ -270,3 +302,83 @@ class Order(object):
         return "Order (Score {score:>5}; Price {price:>8.2f}; \
 Vendors {vendors:>3})".format(score=self.score(), price=self.totalprice(),
                               vendors=len(self.vendors))
+
+
+class ParetoFront(object):
+    """
+    Archive of non-dominated orders over (total price, number of vendors,
+    number of far vendors), so the best order for any weights can be found
+    after a single search.
+
+    Since the vendor counts are small integers, the archive keeps at most one
+    order (the cheapest) for each (vendors, far vendors) pair, which keeps
+    insertion cheap.
+    """
+    def __init__(self):
+        self.front = {}  # {(nr vendors, nr far): (price, order)}
+
+    def add(self, order):
+        """
+        Add an order if no order in the archive dominates it, removing the
+        orders it dominates. Returns whether the order was added.
+        """
+        price, nrvendors, nrfar = order.objectives()
+        for (v, f), (p, other) in iteritems(self.front):
+            if v <= nrvendors and f <= nrfar and p <= price:
+                return False
+        self.front = {(v, f): (p, other) for (v, f), (p, other)
+                      in iteritems(self.front)
+                      if not (v >= nrvendors and f >= nrfar and p >= price)}
+        self.front[(nrvendors, nrfar)] = (price, order)
+        return True
+
+    def orders(self):
+        """
+        All orders in the archive, from cheapest to most expensive
+        """
+        return [order for price, order in sorted(self.front.values(),
+                                                 key=lambda po: po[0])]
+
+    def ranked(self, weight, w_far):
+        """
+        All orders in the archive, sorted by their score for these weights
+        """
+        return sorted(self.orders(),
+                      key=lambda order: order.score(weight, w_far))
+
+    def best(self, weight, w_far):
+        """
+        The order with the best score for these weights
+        """
+        return self.ranked(weight, w_far)[0]
+
+    def save(self, filename="pareto.txt", weights=()):
+        """
+        Save every order in the archive, cheapest first, with its price,
+        vendors, far vendors and the URLs of its lots (like Order.save).
+        For each (weight, w_far) pair in weights, the number of the best
+        order for those weights is listed at the top.
+        """
+        orders = self.orders()
+        # look the best order up by position, not with Order.__eq__, which
+        # compares the (rounded) scores for the default weights
+        lines = ["Best order for weight {0}, w_far {1}: {2}".format(
+                 weight, w_far, min(range(len(orders)), key=lambda i:
+                                    orders[i].score(weight, w_far)))
+                 for weight, w_far in weights]
+        blocks = ["\n".join(lines)] if lines else []
+        for i, order in enumerate(orders):
+            header = "Order {0}: price {1:.2f}; vendors {2}; far vendors {3}"\
+                .format(i, *order.objectives())
+            blocks.append(header + "\n\n" + order.give_URLs())
+        with open(filename, "w") as f:
+            f.write("\n\n\n".join(blocks))
+
+    def __len__(self):
+        return len(self.front)
+
+    def __iter__(self):
+        return iter(self.orders())
+
+    def __repr__(self):
+        return "ParetoFront ({nr} orders)".format(nr=len(self))
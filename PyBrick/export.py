@@ -0,0 +1,207 @@
+"""
+PyBrick
+Olivier Burggraaff
+
+Export of orders as per-vendor carts
+"""
+from __future__ import print_function, division
+import csv
+import json
+import os
+import sys
+import xml.etree.ElementTree as ET
+from multiprocessing.pool import ThreadPool
+
+FORMATS = ("xml", "csv", "json")
+LOT_FIELDS = ["vendor", "nr", "itemtype", "itemID", "colorID", "itemname",
+              "colourname", "condition", "qty", "price", "price_total", "URL"]
+
+
+def lot_key(lot):
+    """
+    Unique key of a lot, like Brick.code for bricks
+    """
+    return lot.vendor.storename + "|" + str(lot.nr)
+
+
+def lot_row(lot):
+    """
+    Everything needed to order a lot, as a dictionary with LOT_FIELDS as keys
+    """
+    part = lot.part
+    return {"vendor": lot.vendor.storename, "nr": lot.nr,
+            "itemtype": getattr(part, "ItemTypeID", "P"),
+            "itemID": part.itemID, "colorID": part.colorID,
+            "itemname": part.itemname, "colourname": part.colourname,
+            "condition": part.condition, "qty": lot.order_amount,
+            "price": lot.price, "price_total": lot.price_total,
+            "URL": lot.URL}
+
+
+def vendor_row(vendor):
+    return {"storename": vendor.storename, "name": vendor.name,
+            "loc": vendor.loc, "minbuy": vendor.minbuy,
+            "close": vendor.close, "URL": vendor.URL}
+
+
+def wanted_list(lots):
+    """
+    Make a BrickLink wanted list (XML) for a list of lots, which can be
+    uploaded on BrickLink to fill a cart
+    """
+    inventory = ET.Element("INVENTORY")
+    for lot in lots:
+        row = lot_row(lot)
+        item = ET.SubElement(inventory, "ITEM")
+        for tag, value in (("ITEMTYPE", row["itemtype"]),
+                           ("ITEMID", row["itemID"]),
+                           ("COLOR", row["colorID"]),
+                           ("MAXPRICE", "{0:.3f}".format(row["price"])),
+                           ("MINQTY", row["qty"]),
+                           ("CONDITION", row["condition"]),
+                           ("REMARKS", "Lot {0}".format(row["nr"]))):
+            if value:
+                ET.SubElement(item, tag).text = str(value)
+    return ET.tostring(inventory).decode("utf-8")
+
+
+def _open(filename, newline=None):
+    """
+    Open a file to write UTF-8 text to, whatever the locale (newline="" for
+    CSV files)
+    """
+    if sys.version_info[0] == 2:
+        return open(filename, "wb" if newline == "" else "w")
+    return open(filename, "w", encoding="utf-8", newline=newline)
+
+
+def save_carts(order, folder, formats=FORMATS):
+    """
+    Save an order as one cart per vendor, in a given folder
+
+    Parameters
+    ----------
+    order: Order
+        Order to save
+    folder: str
+        Folder to save the carts in; created if it does not exist
+    formats: iterable, optional
+        Which of "xml" (BrickLink wanted list), "csv" and "json" to save
+        Default: all
+    """
+    if not os.path.isdir(folder):
+        os.makedirs(folder)
+    for vendor, lots in order.lots_per_vendor().items():
+        filename = os.path.join(folder, vendor.storename)
+        rows = [lot_row(lot) for lot in lots]
+        if "xml" in formats:
+            with _open(filename + ".xml") as f:
+                f.write(wanted_list(lots))
+        if "csv" in formats:
+            with _open(filename + ".csv", newline="") as f:
+                writer = csv.DictWriter(f, LOT_FIELDS)
+                writer.writeheader()
+                writer.writerows(rows)
+        if "json" in formats:
+            cart = {"vendor": vendor_row(vendor), "lots": rows,
+                    "total": round(sum(row["price_total"] for row in rows), 3)}
+            with _open(filename + ".json") as f:
+                json.dump(cart, f, indent=1, sort_keys=True)
+
+
+class Catalogue(object):
+    """
+    Vendor and lot tables shared by many orders, so that each order is only
+    stored as a list of lot keys. Orders with exactly the same lots are only
+    stored once.
+    """
+    def __init__(self):
+        self.vendors = {}  # {storename: vendor_row}
+        self.lots = {}  # {lot_key: lot_row}
+        self.orders = []  # [[lot_key, ...], ...]
+        self._index = {}  # {tuple of lot keys: index in self.orders}
+
+    def add(self, order):
+        """
+        Add an order to the catalogue, and return its index in
+        Catalogue.orders
+        """
+        keys = tuple(sorted(lot_key(lot) for lot in order.lots))
+        try:
+            return self._index[keys]
+        except KeyError:
+            pass
+        for lot in order.lots:
+            if lot.vendor.storename not in self.vendors:
+                self.vendors[lot.vendor.storename] = vendor_row(lot.vendor)
+            key = lot_key(lot)
+            if key not in self.lots:
+                self.lots[key] = lot_row(lot)
+        self._index[keys] = len(self.orders)
+        self.orders.append(list(keys))
+        return self._index[keys]
+
+    def save(self, filename="catalogue.json"):
+        with _open(filename) as f:
+            json.dump({"vendors": self.vendors, "lots": self.lots,
+                       "orders": self.orders}, f, indent=1, sort_keys=True)
+
+    def __len__(self):
+        return len(self.orders)
+
+    def __repr__(self):
+        return "Catalogue ({o} orders; {v} vendors; {l} lots)".format(
+            o=len(self.orders), v=len(self.vendors), l=len(self.lots))
+
+
+def save_orders(orders, folder, formats=FORMATS, processes=None):
+    """
+    Save many orders at once as per-vendor carts, in parallel
+
+    Each unique order is saved to its own subfolder, folder/order_000 etc.,
+    using save_carts. The shared vendor and lot tables are saved to
+    folder/catalogue.json.
+
+    Parameters
+    ----------
+    orders: iterable
+        Orders to save
+    folder: str
+        Folder to save the orders in; created if it does not exist
+    formats: iterable, optional
+        Which of "xml" (BrickLink wanted list), "csv" and "json" to save
+        Default: all
+    processes: int, optional
+        Number of threads to save with
+        Default: one per CPU
+
+    Returns
+    -------
+    catalogue: Catalogue
+        Shared tables of the saved orders
+    indices: list
+        For each given order, the number of the subfolder it was saved to
+    """
+    if not os.path.isdir(folder):
+        os.makedirs(folder)
+    catalogue = Catalogue()
+    unique = {}
+    indices = []
+    for order in orders:
+        index = catalogue.add(order)
+        unique.setdefault(index, order)
+        indices.append(index)
+
+    def save_one(index):
+        subfolder = os.path.join(folder, "order_{0:03d}".format(index))
+        save_carts(unique[index], subfolder, formats=formats)
+
+    pool = ThreadPool(processes)
+    try:
+        pool.map(save_one, sorted(unique))
+    finally:
+        pool.close()
+        pool.join()
+    catalogue.save(os.path.join(folder, "catalogue.json"))
+
+    return catalogue, indices
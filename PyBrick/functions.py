@@ -12,6 +12,7 @@ from bs4 import BeautifulSoup as soup
 import random as ran
 import ssl
 import datetime
+import time
 
 try:
     reduce = reduce  # python 2
@@ -28,6 +29,36 @@ else:
     ssl._create_default_https_context = _create_unverified_https_context
 
 
+def get_html(URL):
+    """
+    Fetch the page at URL from BrickLink
+
+    Raises requests.HTTPError if the server answers with an error
+    """
+    response = requests.get(URL, headers={'User-Agent': 'Mozilla/5.0'})
+    response.raise_for_status()
+    return response.text
+
+
+def _get_with_retries(get, URL, retries=3, backoff=1., verboseprint=print):
+    """
+    Fetch the page at URL with get, trying again up to retries times if the
+    server answers with a (temporary) 5xx error, waiting backoff seconds
+    before the first retry and twice as long before each next one
+    """
+    for attempt in range(retries + 1):
+        try:
+            return get(URL)
+        except requests.HTTPError as e:
+            status = getattr(e.response, "status_code", None)
+            if attempt == retries or status is None or status < 500:
+                raise
+            wait = backoff * 2**attempt
+            verboseprint("Error {0}, trying again in {1} s"
+                         .format(status, wait))
+            time.sleep(wait)
+
+
 def read_settings(args):
     regions = ["None", "Asia", "Africa", "North America", "South America",
                "Middle East", "Europe", "Australia & Oceania"]
@@ -148,7 +179,7 @@ def check_enough(bricks):
         raise ValueError("You will NEVER be able to order sufficient parts of \
                          the following bricks with current settings. Consider \
                          ordering these in different colours:\n \
-                         {never}".format(never))
+                         {never}".format(never=never))
     notenough = []
     for part in parts:
         if not part.enough():
@@ -169,7 +200,8 @@ def divide_vendors(vendors, lots_always):
 
 
 def read_vendors(allbricks, settings, len_vendors=100, harsh=False,
-                 verboseprint=print):
+                 verboseprint=print, get=get_html, retries=3,
+                 backoff=1.):
     """
     Parse the Bricklist website to look for vendors of the bricks you wish to
     purchase
@@ -184,6 +216,20 @@ def read_vendors(allbricks, settings, len_vendors=100, harsh=False,
     verboseprint: function
         Function to print with
         Default: print
+    get: function
+        Function that returns the HTML of a URL, e.g. a replay.Recorder or
+        replay.Fixtures.get to record or replay pages. Pages that fail with a
+        5xx error are tried again. Any other error, such as a 4xx error or
+        a KeyError from Fixtures.get for a page that was never recorded,
+        is raised and stops the search for vendors.
+        Default: get_html
+    retries: int
+        How many times to try again after a 5xx error
+        Default: 3
+    backoff: float
+        Seconds to wait before the first retry, doubling for each next one
+        (0 for replay tests)
+        Default: 1.
 
     Returns
     -------
@@ -200,13 +246,16 @@ def read_vendors(allbricks, settings, len_vendors=100, harsh=False,
     for j, part in enumerate(allbricks):
         verboseprint(j, part.code)
         URL = part.URL(params_init)
-        html = requests.get(URL, headers={'User-Agent': 'Mozilla/5.0'}).text
+        html = _get_with_retries(get, URL, retries=retries,
+                                 backoff=backoff, verboseprint=verboseprint)
         htmlsoup = soup(html, "html.parser")
         if "No Item(s) were found.  Please try again!" in htmlsoup.text:
             params_init_ = params_init.copy()
             params_init_["qMin"] = 1
             URL = part.URL(params_init_)
-            html = requests.get(URL, headers={'User-Agent': 'Mozilla/5.0'}).text
+            html = _get_with_retries(get, URL, retries=retries,
+                                     backoff=backoff,
+                                     verboseprint=verboseprint)
             htmlsoup = soup(html, "html.parser")
         qtylinkprice = htmlsoup.findAll("td", {"valign": "TOP"})
         locminbuy = htmlsoup.findAll("font", {"color": r"#606060"})
@@ -302,7 +351,13 @@ def _generate_vendors(optimize_parts, notenough, vendors_always,
 def find_order(optimize_parts, lots_always, vendors_always, vendors_close_big,
                vendors_close, vendors_far, notenough,
                max_vendors=10, harsh=False, weight=20, w_far=150,
-               verboseprint=print, timeout=10.):
+               verboseprint=print, timeout=10., front=None):
+    """
+    Randomly generate valid orders until the timeout (in minutes) is reached
+
+    If a ParetoFront is given as front, every valid order is also added to
+    it, so the best order for other weights can be found afterwards.
+    """
     now = datetime.datetime.now
     t_end = now() + datetime.timedelta(minutes=timeout)
     verboseprint("Starting optimisation; will take until {0:02d}:{1:02d}"
@@ -342,6 +397,8 @@ def find_order(optimize_parts, lots_always, vendors_always, vendors_close_big,
         j += 1
         verboseprint(j, order)
         orders.add(order)
+        if front is not None:
+            front.add(order)
 
         if len(orders) == 400:
             verboseprint("Trimming list of orders...")
@@ -352,6 +409,8 @@ def find_order(optimize_parts, lots_always, vendors_always, vendors_close_big,
     verboseprint("Found", j, "valid orders ( out of", i, "attempts -",
                  round(float(j)/i * 100, 1), "% )")
     verboseprint("in", timeout, "minutes")
+    if front is not None:
+        verboseprint(len(front), "orders on the Pareto front")
 
     try:
         best = orders[0]
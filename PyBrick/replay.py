@@ -0,0 +1,241 @@
+"""
+PyBrick
+Olivier Burggraaff
+
+Recording and replaying of BrickLink search pages, for offline use
+
+A bundled replay server can be run from the command line:
+    python -m PyBrick.replay pages.json.gz -p 8000 -L 0.2 -E 0.05
+"""
+from __future__ import print_function, division
+import gzip
+import json
+import random as ran
+import threading
+import time
+try:  # python2
+    from urllib import urlencode
+    from urlparse import urlsplit, parse_qsl
+except ImportError:  # python3
+    from urllib.parse import urlencode, urlsplit, parse_qsl
+
+try:  # python2
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+except ImportError:  # python3
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+
+from .functions import get_html
+
+
+def fixture_key(URL):
+    """
+    Key under which the page at URL is stored: the path and the sorted query
+    of the URL, so the same Brick.URL gives the same key regardless of host or
+    parameter order
+    """
+    split = urlsplit(URL)
+    query = urlencode(sorted(parse_qsl(split.query, keep_blank_values=True)))
+    return split.path + "?" + query
+
+
+class Fixtures(object):
+    """
+    Archive of recorded BrickLink pages, keyed with fixture_key
+    """
+    def __init__(self, pages=None):
+        self.pages = {} if pages is None else pages
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Load an archive saved with Fixtures.save
+        """
+        with gzip.open(filename, "rb") as f:
+            pages = json.loads(f.read().decode("utf-8"))
+        return cls(pages)
+
+    def save(self, filename):
+        """
+        Save the archive as gzipped JSON
+        """
+        with gzip.open(filename, "wb") as f:
+            f.write(json.dumps(self.pages, sort_keys=True).encode("utf-8"))
+
+    def add(self, URL, html):
+        self.pages[fixture_key(URL)] = html
+
+    def get(self, URL):
+        """
+        Offline stand-in for functions.get_html
+        """
+        try:
+            return self.pages[fixture_key(URL)]
+        except KeyError:
+            raise KeyError("No recorded page for " + URL)
+
+    def __contains__(self, URL):
+        return fixture_key(URL) in self.pages
+
+    def __len__(self):
+        return len(self.pages)
+
+    def __repr__(self):
+        return "Fixtures ({nr} pages)".format(nr=len(self))
+
+
+class Recorder(object):
+    """
+    Wraps a page getter (by default functions.get_html) and records every
+    page it fetches into a Fixtures archive
+    """
+    def __init__(self, get=get_html, fixtures=None):
+        self._get = get
+        self.fixtures = Fixtures() if fixtures is None else fixtures
+        self._lock = threading.Lock()
+
+    def __call__(self, URL):
+        html = self._get(URL)
+        with self._lock:
+            self.fixtures.add(URL, html)
+        return html
+
+    def save(self, filename):
+        self.fixtures.save(filename)
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        delay, fail = self.server.draw()
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            self._respond(503, "Replayed error")
+            return
+        try:
+            html = self.server.fixtures.pages[fixture_key(self.path)]
+        except KeyError:
+            self._respond(404, "No recorded page for " + self.path)
+            return
+        self._respond(200, html)
+
+    def _respond(self, code, text):
+        body = text.encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass  # keep the console quiet during load tests
+
+
+class ReplayServer(ThreadingMixIn, HTTPServer):
+    """
+    Local HTTP server that serves the pages in a Fixtures archive in place of
+    www.bricklink.com
+
+    Every request waits latency seconds plus a uniform random extra of up to
+    jitter seconds, and fails with a 503 error with probability error_rate.
+    Pages that were never recorded give a 404 error. Use a seed to make the
+    sequence of delays and errors reproducible. Through functions.get_html,
+    errors are raised as requests.HTTPError; read_vendors tries the 503
+    errors again.
+    """
+    daemon_threads = True
+
+    def __init__(self, fixtures, host="127.0.0.1", port=0, latency=0.,
+                 jitter=0., error_rate=0., seed=None):
+        HTTPServer.__init__(self, (host, port), _ReplayHandler)
+        self.fixtures = fixtures
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = ran.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self):
+        """
+        Draw the delay and whether to fail for one request
+        """
+        with self._lock:
+            delay = self.latency + self.jitter * self._random.random()
+            fail = self._random.random() < self.error_rate
+        return delay, fail
+
+    @property
+    def URL(self):
+        return "http://{0}:{1}".format(*self.server_address[:2])
+
+    def start(self):
+        """
+        Serve in a background thread; returns the server itself
+        """
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def replay_get(server_URL, get=get_html):
+    """
+    Make a page getter that sends requests to the (replay) server at
+    server_URL instead of www.bricklink.com
+
+    Parameters
+    ----------
+    server_URL: str
+        Address of the server, e.g. "http://127.0.0.1:8000"
+    get: function, optional
+        Page getter to wrap
+        Default: functions.get_html
+
+    Returns
+    -------
+    get_replayed: function
+        Page getter that can be passed to read_vendors
+    """
+    server_URL = server_URL.rstrip("/")
+
+    def get_replayed(URL):
+        split = urlsplit(URL)
+        return get(server_URL + split.path + "?" + split.query)
+
+    return get_replayed
+
+
+if __name__ == "__main__":
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser()
+    parser.add_argument("fixtures", help="Fixture archive to replay, as made\
+                        with main.py --record")
+    parser.add_argument("-n", "--host", help="Host to serve on",
+                        default="127.0.0.1")
+    parser.add_argument("-p", "--port", help="Port to serve on", type=int,
+                        default=8000)
+    parser.add_argument("-L", "--latency", help="Seconds to wait before each\
+                        response", type=float, default=0.)
+    parser.add_argument("-J", "--jitter", help="Maximum random extra seconds\
+                        to wait before each response", type=float, default=0.)
+    parser.add_argument("-E", "--error_rate", help="Fraction of requests to\
+                        answer with an error", type=float, default=0.)
+    parser.add_argument("-S", "--seed", help="Random seed for delays and\
+                        errors", type=int, default=None)
+    args = parser.parse_args()
+
+    fixtures = Fixtures.load(args.fixtures)
+    server = ReplayServer(fixtures, host=args.host, port=args.port,
+                          latency=args.latency, jitter=args.jitter,
+                          error_rate=args.error_rate, seed=args.seed)
+    print("Replaying {0} pages on {1}".format(len(fixtures), server.URL))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
@@ -7,6 +7,9 @@ Main script
 from __future__ import print_function
 
 from PyBrick import functions as f
+from PyBrick.classes import ParetoFront
+from PyBrick import replay
+from PyBrick import export
 from argparse import ArgumentParser
 
 parser = ArgumentParser()
@@ -29,6 +32,19 @@ parser.add_argument("-f", "--w_far", help="Weight to add for faraway vendors",
 parser.add_argument("-H", "--harsh", action="store_true", help="If True, only\
                     use vendors from preferred countries")
 parser.add_argument("-q", "--quiet", action="store_true")
+parser.add_argument("-P", "--pareto", help="Location to save the Pareto\
+                    front of orders (price, vendors, far vendors) to",
+                    default=None)
+parser.add_argument("-W", "--pareto_weights", help="Extra weight,w_far pairs\
+                    to list the best Pareto front order for, e.g. 10,50",
+                    nargs="*", default=[])
+parser.add_argument("-c", "--carts", help="Folder to save the best order and\
+                    the Pareto front to, as per-vendor carts", default=None)
+parser.add_argument("-r", "--record", help="Save all BrickLink pages that are\
+                    fetched to this fixture archive", default=None)
+parser.add_argument("-R", "--replay", help="Fixture archive (or URL of a\
+                    running replay server) to read BrickLink pages from\
+                    instead of the live website", default=None)
 args = parser.parse_args()
 
 # print if not quiet, else do nothing
@@ -43,12 +59,27 @@ verboseprint("Read BSX filenames from {0}".format(args.bsx_list))
 allbricks = f.read_bricks(bsx_files, verboseprint=verboseprint)
 verboseprint("Made list of {0} types of bricks".format(len(allbricks)))
 
+if args.replay is None:
+    get = f.get_html
+elif "://" in args.replay:
+    get = replay.replay_get(args.replay)
+else:
+    get = replay.Fixtures.load(args.replay).get
+    verboseprint("Replaying BrickLink pages from {0}".format(args.replay))
+if args.record is not None:
+    get = replay.Recorder(get)
+
 vendors = f.read_vendors(allbricks, settings, harsh=args.harsh,
                          verboseprint=verboseprint,
-                         len_vendors=args.len_vendors)
+                         len_vendors=args.len_vendors, get=get)
 verboseprint("Made list of vendors, {nr} in total".format(nr=len(vendors)))
 print(vendors)
 
+if args.record is not None:
+    get.save(args.record)
+    verboseprint("Recorded {0} BrickLink pages to {1}"
+                 .format(len(get.fixtures), args.record))
+
 optimize_parts, lots_always = f.prepare_bricks(allbricks)
 
 vendors_always, vendors_close_big, vendors_close, vendors_far = \
@@ -56,13 +87,14 @@ vendors_always, vendors_close_big, vendors_close, vendors_far = \
 
 optimize_parts, notenough = f.check_enough(optimize_parts)
 
+front = ParetoFront()
 best_order, orders = f.find_order(optimize_parts, lots_always, vendors_always,
                                   vendors_close_big, vendors_close,
                                   vendors_far, notenough,
                                   max_vendors=args.max_vendors,
                                   harsh=args.harsh, weight=args.weight,
                                   w_far=args.w_far, verboseprint=verboseprint,
-                                  timeout=args.timeout)
+                                  timeout=args.timeout, front=front)
 
 if len(notenough):
     print("\nNote: with current settings for finding vendors, you cannot order\
@@ -77,3 +109,20 @@ for part in optimize_parts[:10]:
 
 verboseprint("\nSaving best order to file:", args.save_to)
 best_order.save(args.save_to)
+
+if args.pareto is not None:
+    verboseprint("Saving Pareto front of {0} orders to file:"
+                 .format(len(front)), args.pareto)
+    weights = [(args.weight, args.w_far)]
+    weights += [tuple(float(w) for w in pair.split(","))
+                for pair in args.pareto_weights]
+    front.save(args.pareto, weights=weights)
+
+if args.carts is not None:
+    catalogue, indices = export.save_orders([best_order] + front.orders(),
+                                            args.carts)
+    verboseprint("Saved {0} orders as per-vendor carts to folder:"
+                 .format(len(catalogue)), args.carts)
+    verboseprint("Best order: order_{0:03d}; Pareto front (cheapest first):"
+                 .format(indices[0]),
+                 ", ".join("order_{0:03d}".format(i) for i in indices[1:]))